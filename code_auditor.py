@@ -1,17 +1,23 @@
 import os
+import io
+import re
 import ast
 import argparse
+import json
+import shutil
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import time
 
 # --- Gestione delle Dipendenze Opzionali ---
-try:
-    import networkx as nx
-    import matplotlib.pyplot as plt
-    VISUALS_AVAILABLE = True
-except ImportError:
-    VISUALS_AVAILABLE = False
+# Le librerie per il grafico sono pesanti da importare: vengono caricate
+# solo quando serve davvero (vedi _ensure_visuals)
+VISUALS_AVAILABLE = None  # None = non ancora verificato
+NETWORKX_AVAILABLE = False
+NUMBA_AVAILABLE = False
+np = plt = nx = prange = _fr_step = None
 
 try:
     from tabulate import tabulate
@@ -20,47 +26,300 @@ except ImportError:
     TABULATE_AVAILABLE = False
 # ---------------------------------------------
 
+EXCLUDED_DIRS = {'__pycache__', '_build', '.pytest_cache', '.venv'}
+
+# Cache dei risultati dell'analisi AST, salvata accanto al report.
+# È in JSON e non in pickle: può trovarsi in un progetto non fidato e non deve poter eseguire codice
+CACHE_FILENAME = ".codebase_audit_cache.json"
+CACHE_VERSION = 3
+
+# Parole chiave usate per classificare le funzioni nelle sezioni del report
+TAG_KEYWORDS = {
+    'pipeline': ('pipeline', 'run', 'solve'),
+    'data': ('load', 'save', 'process', 'read', 'write', 'preprocess'),
+}
+# Un'unica alternanza per tag: una sola scansione del nome invece di una per parola chiave
+TAG_PATTERNS = {tag: re.compile('|'.join(map(re.escape, words))) for tag, words in TAG_KEYWORDS.items()}
+
+
+# Campi dei nodi AST che contengono liste di istruzioni (o handler/case con istruzioni)
+_STMT_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+# Nodi che possono avere una docstring come prima istruzione del body (come in ast.get_docstring)
+_DOCSTRING_OWNERS = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def _is_docstring(stmt):
+    return isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str)
+
+
+def _is_main_guard(test):
+    """Riconosce la condizione `__name__ == "__main__"`."""
+    return (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)
+            and isinstance(test.left, ast.Name) and test.left.id == '__name__'
+            and isinstance(test.comparators[0], ast.Constant) and test.comparators[0].value == '__main__')
+
+
+class _Analyzer(ast.NodeVisitor):
+    """Estrae funzioni, classi e import di un modulo con un'unica visita dell'AST."""
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self.functions = {}
+        self.classes = {}
+        self.imports = []
+        self.func_stack = []
+        self.has_main = False
+        # Profondità nell'AST: a parità di nome vince la definizione più profonda,
+        # come con la visita in ampiezza di ast.walk usata in precedenza
+        self.depth = 0
+        self._func_depth = {}
+        self._class_depth = {}
+
+    def generic_visit(self, node):
+        # Funzioni, classi, import e costrutti di controllo sono sempre istruzioni:
+        # si scende solo nei blocchi di istruzioni, senza mai visitare le espressioni
+        self.depth += 1
+        for field in _STMT_FIELDS:
+            stmts = getattr(node, field, ())
+            start = 0
+            if field == 'body' and stmts and isinstance(node, _DOCSTRING_OWNERS) and _is_docstring(stmts[0]):
+                start = 1  # Le docstring non contribuiscono a nessuna metrica
+            for i in range(start, len(stmts)):
+                self.visit(stmts[i])
+        self.depth -= 1
+
+    def visit_Module(self, node):
+        # Il guard `if __name__ == "__main__"` ha senso solo a livello di modulo
+        for stmt in node.body:
+            if isinstance(stmt, ast.If) and _is_main_guard(stmt.test):
+                self.has_main = True
+                break
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self.func_stack.append({'c': 0})
+        self.generic_visit(node)
+        counter = self.func_stack.pop()
+        # Come con ast.walk, i costrutti delle funzioni annidate contano anche per la funzione esterna
+        if self.func_stack: self.func_stack[-1]['c'] += counter['c']
+        func_name = f"{self.module_name}.{node.name}"
+        if self.depth >= self._func_depth.get(func_name, -1):
+            self._func_depth[func_name] = self.depth
+            self.functions[func_name] = {'complexity': counter['c'] + 1}
+
+    def _visit_branch(self, node):
+        if self.func_stack: self.func_stack[-1]['c'] += 1
+        self.generic_visit(node)
+
+    visit_If = visit_For = visit_While = visit_Try = visit_With = _visit_branch
+
+    def visit_ClassDef(self, node):
+        methods = [item.name for item in node.body if isinstance(item, ast.FunctionDef)]
+        class_name = f"{self.module_name}.{node.name}"
+        if self.depth >= self._class_depth.get(class_name, -1):
+            self._class_depth[class_name] = self.depth
+            self.classes[class_name] = {'methods': methods, 'is_strategy': 'strategy' in node.name.lower() or 'strategies' in self.module_name}
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names: self.imports.append((alias.name, 0))
+
+    def visit_ImportFrom(self, node):
+        if node.module: self.imports.append((node.module, node.level))
+
+
+def _analyze_one(file_info, root_dir):
+    """
+    Esegue un'analisi AST completa su un singolo file.
+    Funzione di modulo (e non metodo) per poter essere eseguita nei processi worker.
+    """
+    file_path, module_name = file_info
+    try:
+        # ast.parse accetta direttamente i bytes e gestisce da sé la decodifica (PEP 263)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        tree = ast.parse(data, filename=file_path)
+        del data  # Sorgente e AST vengono rilasciati appena usati: la RSS dei worker resta limitata
+
+        analyzer = _Analyzer(module_name)
+        analyzer.visit(tree)
+        del tree
+        return module_name, analyzer.functions, analyzer.classes, analyzer.imports, analyzer.has_main
+    except Exception as e:
+        print(f"   - ⚠️  Errore nell'analisi di {os.path.relpath(file_path, root_dir)}: {e}")
+        return None
+
+
+def _is_valid_cache_entry(entry, key, module_name):
+    """Una voce di cache è usabile solo se ben formata e relativa alla stessa versione del file."""
+    return (isinstance(entry, list) and len(entry) == 2 and entry[0] == key
+            and isinstance(entry[1], list) and len(entry[1]) == 5 and entry[1][0] == module_name
+            and isinstance(entry[1][1], dict) and isinstance(entry[1][2], dict) and isinstance(entry[1][3], list))
+
+
+def _ensure_visuals():
+    """Importa al primo utilizzo le librerie per il grafico; restituisce True se disponibili."""
+    global VISUALS_AVAILABLE, NETWORKX_AVAILABLE, NUMBA_AVAILABLE, np, plt, nx, prange, _fr_step
+    if VISUALS_AVAILABLE is not None:
+        return VISUALS_AVAILABLE
+
+    try:
+        import numpy as np
+        import matplotlib.pyplot as plt
+        VISUALS_AVAILABLE = True
+    except ImportError:
+        VISUALS_AVAILABLE = False
+        return False
+
+    try:
+        import networkx as nx
+        NETWORKX_AVAILABLE = True
+    except ImportError:
+        NETWORKX_AVAILABLE = False
+
+    try:
+        from numba import njit, prange
+        _fr_step = njit(parallel=True, fastmath=True, cache=True)(_fr_step_kernel)
+        NUMBA_AVAILABLE = True
+    except ImportError:
+        NUMBA_AVAILABLE = False
+    return True
+
+
+def _fr_step_kernel(pos, adj_i, adj_j, k, temp):
+    """
+    Singola iterazione Fruchterman-Reingold, da compilare con Numba (vedi _ensure_visuals).
+    Le adiacenze sono in formato CSR (`adj_i` = offset, `adj_j` = vicini): nessun array N×N.
+    """
+    n = pos.shape[0]
+    disp = np.zeros_like(pos)
+    for i in prange(n):
+        dx_sum = 0.0
+        dy_sum = 0.0
+        # Repulsione tra tutte le coppie di nodi
+        for j in range(n):
+            if i == j:
+                continue
+            dx = pos[i, 0] - pos[j, 0]
+            dy = pos[i, 1] - pos[j, 1]
+            d2 = max(dx * dx + dy * dy, 1e-4)
+            f = k * k / d2
+            dx_sum += dx * f
+            dy_sum += dy * f
+        # Attrazione lungo gli archi
+        for idx in range(adj_i[i], adj_i[i + 1]):
+            j = adj_j[idx]
+            dx = pos[i, 0] - pos[j, 0]
+            dy = pos[i, 1] - pos[j, 1]
+            f = max(np.sqrt(dx * dx + dy * dy), 0.01) / k
+            dx_sum -= dx * f
+            dy_sum -= dy * f
+        disp[i, 0] = dx_sum
+        disp[i, 1] = dy_sum
+    for i in prange(n):
+        length = np.sqrt(disp[i, 0] * disp[i, 0] + disp[i, 1] * disp[i, 1])
+        if length < 0.01:
+            length = 0.1
+        pos[i, 0] += disp[i, 0] * temp / length
+        pos[i, 1] += disp[i, 1] * temp / length
+
+
+def _csr_adjacency(n, edges):
+    """Adiacenze simmetriche e senza duplicati in formato CSR (offset, vicini)."""
+    pairs = np.unique(np.concatenate([edges, edges[:, ::-1]]), axis=0)
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=n), out=indptr[1:])
+    return indptr, np.ascontiguousarray(pairs[:, 1])
+
+
+def _spring_layout(n, edges, k, iterations=50, seed=42):
+    """
+    Layout force-directed (Fruchterman-Reingold) vettorizzato con NumPy,
+    o compilato con Numba se disponibile.
+    Restituisce un array (n, 2) di posizioni normalizzate in [-1, 1].
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2))
+    if n == 1:
+        return pos
+
+    # Temperatura iniziale pari a un decimo dell'area, raffreddata linearmente
+    temp = 0.1 * max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1]))
+    dt = temp / (iterations + 1)
+
+    if NUMBA_AVAILABLE:
+        adj_i, adj_j = _csr_adjacency(n, edges)
+        for _ in range(iterations):
+            _fr_step(pos, adj_i, adj_j, k, temp)
+            temp -= dt
+    else:
+        # Matrice di adiacenza simmetrica: l'attrazione non dipende dal verso dell'arco
+        adj = np.zeros((n, n))
+        if len(edges):
+            adj[edges[:, 0], edges[:, 1]] = 1.0
+            adj = np.maximum(adj, adj.T)
+
+        for _ in range(iterations):
+            diff = pos[:, None, :] - pos[None, :, :]
+            dist = np.linalg.norm(diff, axis=-1)
+            np.clip(dist, 0.01, None, out=dist)
+            force = k * k / dist ** 2 - adj * dist / k
+            displacement = np.einsum('ijk,ij->ik', diff, force)
+            length = np.linalg.norm(displacement, axis=-1)
+            length = np.where(length < 0.01, 0.1, length)
+            pos += displacement * (temp / length)[:, None]
+            temp -= dt
+
+    pos -= pos.mean(axis=0)
+    scale = np.abs(pos).max()
+    return pos / scale if scale > 0 else pos
+
 
 class ReportGenerator:
     """Gestisce la creazione del report in formato Markdown."""
-    def __init__(self, filename="codebase_audit_report.md"):
+    def __init__(self, filename="codebase_audit_report.md", pretty=False):
         self.filename = filename
-        self.content = []
+        self.pretty = pretty
+        self._buf = io.StringIO()
         self.add_title("Codebase Audit Report")
 
+    def _write_line(self, text):
+        self._buf.write(text)
+        self._buf.write("\n")
+
     def add_title(self, text, level=1):
-        self.content.append(f"{'#' * level} {text}\n")
+        self._write_line(f"{'#' * level} {text}\n")
 
     def add_paragraph(self, text):
-        self.content.append(f"{text}\n")
+        self._write_line(f"{text}\n")
 
     def add_code_block(self, code, lang=""):
-        self.content.append(f"```{lang}\n{code}\n```\n")
+        self._write_line(f"```{lang}\n{code}\n```\n")
 
     def add_list(self, items, numbered=False):
         for i, item in enumerate(items):
             prefix = f"{i+1}." if numbered else "-"
-            self.content.append(f"{prefix} {item}")
-        self.content.append("") # Spazio extra
+            self._write_line(f"{prefix} {item}")
+        self._write_line("") # Spazio extra
 
     def add_table(self, headers, data):
-        if TABULATE_AVAILABLE:
-            self.content.append(tabulate(data, headers=headers, tablefmt="github"))
-        else: # Fallback a un formato semplice
-            self.content.append(" | ".join(headers))
-            self.content.append(" | ".join(["---"] * len(headers)))
-            for row in data:
-                self.content.append(" | ".join(map(str, row)))
-        self.content.append("\n")
+        if self.pretty and TABULATE_AVAILABLE: # Colonne allineate, ma molto più lento
+            self._write_line(tabulate(data, headers=headers, tablefmt="github"))
+        else:
+            rows = [" | ".join(headers), " | ".join(["---"] * len(headers))]
+            rows += [" | ".join(map(str, row)) for row in data]
+            self._write_line("\n".join(rows))
+        self._write_line("\n")
 
     def add_image(self, path, alt_text=""):
         # Usa percorsi relativi per la portabilità
         relative_path = Path(path).name
-        self.content.append(f"![{alt_text}]({relative_path})\n")
+        self._write_line(f"![{alt_text}]({relative_path})\n")
 
     def save(self):
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            f.write("\n".join(self.content))
+        # Copia a blocchi dal buffer, senza materializzare una seconda copia del report
+        self._buf.seek(0)
+        with open(self.filename, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            shutil.copyfileobj(self._buf, f)
         print(f"   - ✅ Report salvato come '{self.filename}'")
 
 
@@ -69,64 +328,114 @@ class CodebaseAuditor:
     Uno strumento completo per analizzare, mappare e comprendere un codebase Python.
     Genera un report completo in formato Markdown.
     """
-    def __init__(self, root_dir, report_filename="codebase_audit_report.md"):
+    def __init__(self, root_dir, report_filename="codebase_audit_report.md", use_networkx=False, use_cache=True, pretty_tables=False, draw_graph=True):
         self.root_dir = Path(root_dir).resolve()
-        self.report = ReportGenerator(report_filename)
+        self.report = ReportGenerator(report_filename, pretty=pretty_tables)
+        self.draw_graph = draw_graph
+        self.use_networkx = use_networkx
+        self.cache_file = os.path.join(os.path.dirname(os.path.abspath(report_filename)), CACHE_FILENAME) if use_cache else None
         
         # Strutture dati
         self.python_files = []
         self.project_modules = set()
+        self._module_prefixes = {}
         self.functions = {}
         self.classes = {}
         self.main_entry_points = []
-        self.dependencies = defaultdict(set)
+        self.dependencies = defaultdict(list)  # Può contenere duplicati: deduplicare in fase di report
         self.data_files = []
+        self._funcs_by_tag = defaultdict(list)
+        self._strategy_classes = []
+
+    def _scandir_recursive(self, path):
+        """Genera ricorsivamente i file sotto `path`, saltando link simbolici e cartelle escluse."""
+        try:
+            it = os.scandir(path)
+        except OSError:
+            return  # Come os.walk: le cartelle non leggibili vengono saltate
+        with it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDED_DIRS:
+                        yield from self._scandir_recursive(entry.path)
+                elif entry.is_file():
+                    yield entry
 
     def _discover_files(self):
         """Scopre tutti i file Python e i moduli del progetto."""
-        for root, dirs, files in os.walk(self.root_dir):
-            dirs[:] = [d for d in dirs if d not in ['__pycache__', '_build', '.pytest_cache', '.venv']]
-            
-            for file in files:
-                file_path = Path(root) / file
-                if file.endswith('.py'):
-                    self.python_files.append(str(file_path))
-                    module_name = str(file_path.relative_to(self.root_dir)).replace(os.sep, '.')[:-3]
-                    self.project_modules.add(module_name)
-                elif file.endswith(('.csv', '.xlsx', '.json', '.yaml')):
-                    self.data_files.append(file_path)
-
-    def _analyze_file(self, file_path):
-        """Esegue un'analisi AST completa su un singolo file."""
-        file_path_obj = Path(file_path)
-        relative_path = file_path_obj.relative_to(self.root_dir)
-        module_name = str(relative_path).replace(os.sep, '.')[:-3]
-
+        # I percorsi relativi vengono calcolati una sola volta qui e riusati da analisi e report
+        for entry in self._scandir_recursive(self.root_dir):
+            if entry.name.endswith('.py'):
+                module_name = os.path.relpath(entry.path, self.root_dir)[:-3].replace(os.sep, '.')
+                self.python_files.append((entry.path, module_name))
+                self.project_modules.add(module_name)
+            elif entry.name.endswith(('.csv', '.xlsx', '.json', '.yaml')):
+                self.data_files.append((entry.path, os.path.relpath(entry.path, self.root_dir)))
+
+        # Moduli e package del progetto, associati al nome con cui compaiono nel report:
+        # un package importato come `pkg.sub` è il modulo `pkg.sub.__init__`, se esiste
+        self._module_prefixes = {m.rpartition('.')[0]: m.rpartition('.')[0] for m in self.project_modules if '.' in m}
+        self._module_prefixes.update((m, m) for m in self.project_modules)
+        self._module_prefixes.update((m[:-len('.__init__')], m) for m in self.project_modules if m.endswith('.__init__'))
+
+    def _load_cache(self):
+        """Carica la cache {percorso: [[mtime_ns, size], risultato]}; vuota se assente o non valida."""
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == CACHE_VERSION and data['root'] == str(self.root_dir) and isinstance(data['entries'], dict):
+                return data['entries']
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+        return {}
+
+    def _save_cache(self, entries):
+        if not self.cache_file:
+            return
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            tree = ast.parse(content)
-
-            if 'if __name__ == "__main__"' in content:
-                self.main_entry_points.append(module_name)
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    func_name = f"{module_name}.{node.name}"
-                    self.functions[func_name] = {
-                        'complexity': sum(1 for n in ast.walk(node) if isinstance(n, (ast.If, ast.For, ast.While, ast.Try, ast.With))) + 1
-                    }
-                elif isinstance(node, ast.ClassDef):
-                    class_name = f"{module_name}.{node.name}"
-                    methods = [item.name for item in node.body if isinstance(item, ast.FunctionDef)]
-                    self.classes[class_name] = {'methods': methods, 'is_strategy': 'strategy' in node.name.lower() or 'strategies' in module_name}
-                elif isinstance(node, ast.Import):
-                    for alias in node.names: self._add_dependency(module_name, alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module: self._add_dependency(module_name, node.module, node.level)
-                        
-        except Exception as e:
-            print(f"   - ⚠️  Errore nell'analisi di {relative_path}: {e}")
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'root': str(self.root_dir), 'entries': entries}, f, separators=(',', ':'))
+        except OSError as e:
+            print(f"   - ⚠️  Impossibile salvare la cache '{self.cache_file}': {e}")
+
+    def _analyze_files(self):
+        """Analizza i file Python, riusando dalla cache quelli non modificati dall'ultima esecuzione."""
+        cache = self._load_cache()
+        entries = {}  # Solo i file ancora presenti: le voci obsolete vengono scartate
+        pending = []
+        for file_info in self.python_files:
+            st = os.stat(file_info[0])
+            key = [st.st_mtime_ns, st.st_size]  # Lista, per confrontarsi con i valori riletti dal JSON
+            cached = cache.get(file_info[0])
+            if _is_valid_cache_entry(cached, key, file_info[1]):
+                entries[file_info[0]] = cached
+                self._merge_analysis(cached[1])
+            else:
+                pending.append((file_info, key))
+
+        if pending:
+            print(f"   - {len(self.python_files) - len(pending)} files unchanged (cached), {len(pending)} to parse")
+            with ProcessPoolExecutor() as ex:
+                results = ex.map(partial(_analyze_one, root_dir=str(self.root_dir)), [fi for fi, _ in pending], chunksize=32)
+                for (file_info, key), result in zip(pending, results):
+                    if result is not None:
+                        entries[file_info[0]] = [key, result]
+                        self._merge_analysis(result)
+        self._save_cache(entries)
+
+    def _merge_analysis(self, result):
+        """Integra nelle strutture dati il risultato dell'analisi di un singolo file."""
+        module_name, functions, classes, imports, has_main = result
+        self.functions.update(functions)
+        self.classes.update(classes)
+        for dep_name, level in imports:
+            self._add_dependency(module_name, dep_name, level)
+        if has_main:
+            self.main_entry_points.append(module_name)
 
     def _add_dependency(self, module_name, dep_name, level=0):
         if level > 0:
@@ -136,8 +445,17 @@ class CodebaseAuditor:
         else:
             resolved_dep = dep_name
 
-        if any(resolved_dep.startswith(proj_mod) for proj_mod in self.project_modules if proj_mod == resolved_dep):
-             self.dependencies[module_name].add(resolved_dep)
+        resolved_dep = self._module_prefixes.get(resolved_dep)
+        if resolved_dep is not None:
+            self.dependencies[module_name].append(resolved_dep)
+
+    def _categorize(self):
+        """Classifica funzioni e classi in un'unica passata, per tutte le sezioni del report."""
+        for name in self.functions:
+            for tag, pattern in TAG_PATTERNS.items():
+                if pattern.search(name):
+                    self._funcs_by_tag[tag].append(name)
+        self._strategy_classes = [c for c, v in self.classes.items() if v['is_strategy']]
 
     # --- Metodi di generazione dei contenuti del Report ---
 
@@ -167,13 +485,13 @@ class CodebaseAuditor:
         entry_points = sorted(list(set(['app'] + self.main_entry_points)))
         self.report.add_list([f"`{e}`" for e in entry_points])
         
-        strategies = [c for c, v in self.classes.items() if v['is_strategy']]
+        strategies = self._strategy_classes
         if strategies:
             self.report.add_title("Optimization Strategies", level=3)
             data = [[f"`{s}`", ", ".join(self.classes[s]['methods'][:4]) + ('...' if len(self.classes[s]['methods'])>4 else '')] for s in sorted(strategies)]
             self.report.add_table(["Strategy Class", "Key Methods"], data)
 
-        pipeline_funcs = [f for f in self.functions.keys() if 'pipeline' in f or 'run' in f or 'solve' in f]
+        pipeline_funcs = self._funcs_by_tag['pipeline']
         if pipeline_funcs:
             self.report.add_title("Key Pipeline Functions", level=3)
             data = [[f"`{f}`", self.functions[f]['complexity']] for f in sorted(pipeline_funcs)]
@@ -184,13 +502,12 @@ class CodebaseAuditor:
         if self.data_files:
             self.report.add_title("Identified Data Files", level=3)
             data = []
-            for file in self.data_files:
-                rel_path = file.relative_to(self.root_dir)
-                file_type = "Tabular Data" if ".csv" in file.name else "Excel Sheet" if ".xlsx" in file.name else "Config" if ".yaml" in file.name else "JSON Data"
+            for _, rel_path in self.data_files:
+                file_type = "Tabular Data" if rel_path.endswith(".csv") else "Excel Sheet" if rel_path.endswith(".xlsx") else "Config" if rel_path.endswith(".yaml") else "JSON Data"
                 data.append([f"`{rel_path}`", file_type])
             self.report.add_table(["File Path", "Type"], data)
 
-        data_funcs = [f for f in self.functions.keys() if any(w in f for w in ['load', 'save', 'process', 'read', 'write', 'preprocess'])]
+        data_funcs = self._funcs_by_tag['data']
         if data_funcs:
             self.report.add_title("Data Manipulation Functions", level=3)
             self.report.add_list([f"`{f}`" for f in sorted(data_funcs)])
@@ -200,62 +517,98 @@ class CodebaseAuditor:
         
         # Genera il grafico visuale per primo, così può essere incluso nel report
         image_path = "codebase_dependency_map.png"
-        if VISUALS_AVAILABLE:
-            print("🎨 Generating visual graph...")
-            try:
-                self.visualize_dependencies(image_path)
-                self.report.add_title("Visual Dependency Graph", level=3)
-                self.report.add_image(image_path, "Dependency map of the project modules")
-            except Exception as e:
-                self.report.add_paragraph(f"**Warning:** Could not generate visual graph. Error: {e}")
-        else:
-            self.report.add_paragraph("**Info:** To generate a visual graph, install required libraries: `pip install matplotlib networkx`")
+        if self.draw_graph:
+            if _ensure_visuals():
+                print("🎨 Generating visual graph...")
+                try:
+                    self.visualize_dependencies(image_path)
+                    self.report.add_title("Visual Dependency Graph", level=3)
+                    self.report.add_image(image_path, "Dependency map of the project modules")
+                except Exception as e:
+                    self.report.add_paragraph(f"**Warning:** Could not generate visual graph. Error: {e}")
+            else:
+                self.report.add_paragraph("**Info:** To generate a visual graph, install required libraries: `pip install matplotlib`")
 
         self.report.add_title("Textual Dependency Report", level=3)
         for module in sorted(self.dependencies.keys()):
             self.report.add_paragraph(f"**`{module}`** depends on:")
             if self.dependencies[module]:
-                self.report.add_list([f"`{d}`" for d in sorted(list(self.dependencies[module]))])
+                self.report.add_list([f"`{d}`" for d in sorted(set(self.dependencies[module]))])
             else:
                 self.report.add_list(["(No internal dependencies)"])
 
     def visualize_dependencies(self, output_file):
-        G = nx.DiGraph()
+        nodes = {}
+        edges = []
         for module, deps in self.dependencies.items():
-            G.add_node(module)
-            for dep in deps:
-                G.add_node(dep)
-                G.add_edge(dep, module)
-
-        if not G.nodes(): return
-
-        plt.figure(figsize=(20, 20), dpi=100)
-        pos = nx.spring_layout(G, k=0.9, iterations=50, seed=42)
-        node_sizes = [2000 + 2000 * G.in_degree(n) for n in G.nodes()]
-        node_colors = [G.in_degree(n) for n in G.nodes()]
-
-        nx.draw_networkx_nodes(G, pos, node_size=node_sizes, node_color=node_colors, cmap=plt.cm.viridis, alpha=0.8)
-        nx.draw_networkx_edges(G, pos, width=1.0, alpha=0.5, arrowsize=15, edge_color='gray')
-        nx.draw_networkx_labels(G, pos, font_size=9, font_weight='bold')
+            nodes.setdefault(module, len(nodes))
+            for dep in set(deps):
+                nodes.setdefault(dep, len(nodes))
+                edges.append((nodes[dep], nodes[module]))
+
+        if not nodes: return
+
+        names = list(nodes)
+        edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+        if self.use_networkx and NETWORKX_AVAILABLE:
+            G = nx.DiGraph()
+            G.add_nodes_from(range(len(names)))
+            G.add_edges_from(map(tuple, edges))
+            layout = nx.spring_layout(G, k=0.9, iterations=50, seed=42)
+            pos = np.array([layout[i] for i in range(len(names))])
+        else:
+            pos = _spring_layout(len(names), edges, k=0.9)
+        in_degree = np.bincount(edges[:, 1], minlength=len(names))
+        node_sizes = 2000 + 2000 * in_degree
+
+        fig = plt.figure(figsize=(20, 20), dpi=100)
+        ax = plt.gca()
+        ax.scatter(pos[:, 0], pos[:, 1], s=node_sizes, c=in_degree, cmap='viridis', alpha=0.8, zorder=2)
+        for name, (x, y) in zip(names, pos):
+            ax.text(x, y, name, fontsize=9, fontweight='bold', ha='center', va='center', zorder=3)
         
         plt.title('Codebase Dependency Map', size=20)
         plt.axis('off'); plt.tight_layout()
+        if len(edges):
+            self._draw_arrows(fig, ax, pos, edges, node_sizes)
         plt.savefig(output_file); plt.close()
         print(f"   - ✅ Visual graph saved as '{output_file}'")
 
+    @staticmethod
+    def _draw_arrows(fig, ax, pos, edges, node_sizes):
+        """Disegna gli archi (dipendenza -> modulo) con un'unica chiamata a quiver, fermandoli al bordo dei nodi."""
+        # Il layout è già definitivo: si accorcia in pixel, dove il raggio dei marker è noto
+        ax.set_autoscale_on(False)
+        pix = ax.transData.transform(pos)
+        radius = np.sqrt(node_sizes) / 2 * fig.dpi / 72  # s è l'area in punti^2 del marker
+        start, end = pix[edges[:, 0]], pix[edges[:, 1]]
+        vec = end - start
+        length = np.linalg.norm(vec, axis=1)
+        keep = length > radius[edges[:, 0]] + radius[edges[:, 1]]  # Nodi sovrapposti o auto-import
+        if not keep.any(): return
+        unit = vec[keep] / length[keep, None]
+        start = start[keep] + unit * radius[edges[keep, 0], None]
+        end = end[keep] - unit * radius[edges[keep, 1], None]
+
+        to_data = ax.transData.inverted()
+        start, end = to_data.transform(start), to_data.transform(end)
+        delta = end - start
+        ax.quiver(start[:, 0], start[:, 1], delta[:, 0], delta[:, 1], angles='xy', scale_units='xy', scale=1,
+                  color='gray', alpha=0.5, width=0.001, headwidth=8, headlength=10, headaxislength=9, zorder=1)
+
     def generate_summary_stats(self):
         self.report.add_title("Project Statistics", level=2)
         total_funcs = len(self.functions)
         total_classes = len(self.classes)
         avg_complexity = (sum(f['complexity'] for f in self.functions.values()) / total_funcs) if total_funcs > 0 else 0
-        total_deps = sum(len(d) for d in self.dependencies.values())
+        total_deps = sum(len(set(d)) for d in self.dependencies.values())
 
         data = [
             ["Python Files Analyzed", len(self.python_files)],
             ["Project Modules", len(self.project_modules)],
             ["Total Functions", total_funcs],
             ["Total Classes", total_classes],
-            ["Optimization Strategies", len([c for c, v in self.classes.items() if v['is_strategy']])],
+            ["Optimization Strategies", len(self._strategy_classes)],
             ["Avg. Function Complexity", f"{avg_complexity:.2f}"],
             ["Internal Dependency Links", total_deps]
         ]
@@ -270,8 +623,8 @@ class CodebaseAuditor:
         self._discover_files()
 
         print(f"2. Analyzing {len(self.python_files)} Python files...")
-        for file_path in self.python_files:
-            self._analyze_file(file_path)
+        self._analyze_files()
+        self._categorize()
 
         print("3. Generating report sections...")
         self.generate_summary_stats()
@@ -291,13 +644,17 @@ def main():
     parser = argparse.ArgumentParser(description="Analyzes a Python codebase and generates a Markdown report.")
     parser.add_argument('directory', nargs='?', default='.', help="The project root directory (default: current directory).")
     parser.add_argument('--output', default='codebase_audit_report.md', help="Output Markdown file name.")
+    parser.add_argument('--no-cache', action='store_true', help="Re-parse every file, ignoring and not writing the analysis cache.")
+    parser.add_argument('--pretty', action='store_true', help="Align table columns with tabulate (slower; requires tabulate).")
+    parser.add_argument('--no-graph', action='store_true', help="Skip the visual dependency graph (matplotlib is not even imported).")
+    parser.add_argument('--networkx', action='store_true', help="Use NetworkX's spring layout for the dependency graph (requires networkx).")
     args = parser.parse_args()
 
     if not os.path.isdir(args.directory):
         print(f"❌ Error: Directory '{args.directory}' not found.")
         return
 
-    auditor = CodebaseAuditor(args.directory, report_filename=args.output)
+    auditor = CodebaseAuditor(args.directory, report_filename=args.output, use_networkx=args.networkx, use_cache=not args.no_cache, pretty_tables=args.pretty, draw_graph=not args.no_graph)
     auditor.run()
 
 if __name__ == "__main__":